@@ -2,8 +2,8 @@
 from __future__ import annotations
 
 import html
+import io
 import os
-import re
 from dataclasses import asdict
 from typing import Dict, List, Tuple
 
@@ -13,7 +13,6 @@ import streamlit as st
 
 from mediscan_iq.config import settings
 from mediscan_iq.services.analyze import Analyzer
-from mediscan_iq.nlp.risk_tagger import HEURISTIC_PATTERNS
 
 
 # ---------------------------
@@ -91,29 +90,11 @@ def risk_badge(level: str) -> str:
     return f'<span class="badge {css}">{html.escape(level)}</span>'
 
 
-def _collect_matches(text: str) -> List[Tuple[int, int, str]]:
-    """Collect regex spans for heuristic keywords, tagged with risk level."""
-    spans: List[Tuple[int, int, str]] = []
-    t = text
-    for severity, patterns in HEURISTIC_PATTERNS.items():
-        for pat in patterns:
-            for m in re.finditer(pat, t, flags=re.I):
-                spans.append((m.start(), m.end(), severity))
-    # sort, and drop overlaps (keep earliest)
-    spans.sort(key=lambda x: (x[0], -(x[1] - x[0])))
-    non_overlap: List[Tuple[int, int, str]] = []
-    last_end = -1
-    for s, e, sev in spans:
-        if s >= last_end:
-            non_overlap.append((s, e, sev))
-            last_end = e
-    return non_overlap
-
-
-def highlight_text(text: str) -> str:
+@st.cache_data(show_spinner=False)
+def highlight_text(text: str, spans: List[Tuple[int, int, str]]) -> str:
+    """Wrap pre-computed (start, end, severity) spans of `text` in highlight markup."""
     if not text.strip():
         return ""
-    spans = _collect_matches(text)
     if not spans:
         return html.escape(text)
 
@@ -131,21 +112,32 @@ def highlight_text(text: str) -> str:
     return "".join(parts)
 
 
-def probs_chart(probs: Dict[str, float]):
-    df = pd.DataFrame({"label": list(probs.keys()), "prob": list(probs.values())})
-    order = ["low risk", "moderate risk", "high risk"]
-    df["label"] = pd.Categorical(df["label"], categories=order, ordered=True)
-    c = (
-        alt.Chart(df)
+_RISK_ORDER = ["low risk", "moderate risk", "high risk"]
+_RISK_DTYPE = pd.CategoricalDtype(categories=_RISK_ORDER, ordered=True)
+
+
+@st.cache_resource(show_spinner=False)
+def _chart_template() -> alt.Chart:
+    # Static bar spec built once per process; each render only binds the data.
+    return (
+        alt.Chart(pd.DataFrame({"label": pd.Series([], dtype=_RISK_DTYPE), "prob": []}))
         .mark_bar()
         .encode(
-            x=alt.X("label:N", sort=order, title=None),
+            x=alt.X("label:N", sort=_RISK_ORDER, title=None),
             y=alt.Y("prob:Q", title="Probability", scale=alt.Scale(domain=[0, 1])),
             tooltip=["label", alt.Tooltip("prob:Q", format=".3f")],
         )
         .properties(height=200)
     )
-    st.altair_chart(c, use_container_width=True)
+
+
+def probs_chart(probs: Dict[str, float]):
+    df = pd.DataFrame({
+        "label": pd.Categorical(list(probs.keys()), dtype=_RISK_DTYPE),
+        "prob": list(probs.values()),
+    })
+    # .properties() returns a copy, so the cached template is never mutated
+    st.altair_chart(_chart_template().properties(data=df), use_container_width=True)
 
 
 # ---------------------------
@@ -175,7 +167,14 @@ with col1:
     st.subheader("Input")
     default_text = SAMPLES.get(sample_key, "")
     if uploaded is not None:
-        default_text = uploaded.read().decode("utf-8", errors="ignore")
+        # Decode while reading, capped just past MAX_CHARS: no full bytes copy next to the str,
+        # and the extra char lets the over-limit warning below fire instead of a silent cut.
+        uploaded.seek(0)
+        reader = io.TextIOWrapper(uploaded, encoding="utf-8", errors="ignore")
+        default_text = reader.read(settings.max_chars + 1)
+        reader.detach()  # don't close the upload buffer Streamlit owns
+        if len(default_text) > settings.max_chars:
+            st.warning(f"Uploaded file exceeds {settings.max_chars} characters (MAX_CHARS); it will be truncated.")
     text = st.text_area(
         "Paste clinical text (de-identified preferred)",
         value=default_text,
@@ -192,6 +191,9 @@ with col2:
         if not text.strip():
             st.warning("Please paste or upload a report first.")
         else:
+            if len(text) > settings.max_chars:
+                st.warning(f"Input truncated to {settings.max_chars} characters (MAX_CHARS).")
+                text = text[: settings.max_chars]
             with st.spinner("Analyzing…"):
                 result = analyze_cached(text, report_type=report_type)
 
@@ -210,13 +212,13 @@ with col2:
             # Anonymized text with highlights
             st.markdown("**Anonymized input (keyword highlights)**")
             st.markdown(
-                f'<div class="codeblock">{highlight_text(result["anonymized"])}</div>',
+                f'<div class="codeblock">{highlight_text(result["anonymized"], result["hl_spans"])}</div>',
                 unsafe_allow_html=True,
             )
 
             # Meta
             with st.expander("Meta"):
-                md = "\n".join(f"- **{k}**: {v}" for k, v in result["meta"].items())
+                md = "\n".join("- **%s**: %s" % kv for kv in result["meta"].items())
                 st.markdown(md or "_none_", unsafe_allow_html=False)
 
     else:
@@ -1,5 +1,7 @@
+import threading
+from typing import Optional
+
 from fastapi import FastAPI, HTTPException
-from langdetect import detect, DetectorFactory
 
 from .config import settings
 from .logging import get_logger
@@ -8,18 +10,33 @@ from .schemas import (
     IngestResponse,
     AnalyzeRequest,
     AnalyzeResponse,
+    AnalyzeBatchRequest,
+    AnalyzeBatchResponse,
 )
 from .preprocess.anonymizer import anonymize
+from .preprocess.langid import detect_language
 from .preprocess.segmenter import split_sentences
 from .services.analyze import Analyzer
 
-DetectorFactory.seed = 42
-
 logger = get_logger("mediscan.api")
 app = FastAPI(title="MediScan-IQ — Ingest, Summarize, Risk Tag")
 
-# Initialize heavy components once
-analyzer = Analyzer()
+
+# Heavy components are built once per process, on first use rather than at import, so
+# workers that never serve /analyze (and tooling that imports the app) don't load models.
+# lru_cache does not lock while building, so concurrent first requests would each load the
+# models; double-checked locking keeps it to exactly one Analyzer.
+_analyzer: Optional[Analyzer] = None
+_analyzer_lock = threading.Lock()
+
+
+def get_analyzer() -> Analyzer:
+    global _analyzer
+    if _analyzer is None:
+        with _analyzer_lock:
+            if _analyzer is None:
+                _analyzer = Analyzer()
+    return _analyzer
 
 
 @app.get("/health")
@@ -39,10 +56,7 @@ def ingest(payload: IngestRequest):
     if payload.report_type not in settings.accepted_report_types:
         raise HTTPException(status_code=400, detail="Unsupported report_type.")
 
-    try:
-        lang = detect(text)
-    except Exception:
-        lang = None
+    lang = detect_language(text)
 
     anon, counts = anonymize(text)
     sents = split_sentences(anon)
@@ -67,8 +81,7 @@ def ingest(payload: IngestRequest):
     )
 
 
-@app.post("/analyze", response_model=AnalyzeResponse)
-def analyze(payload: AnalyzeRequest):
+def _validated_text(payload: AnalyzeRequest) -> str:
     text = payload.text.strip()
     if len(text) > settings.max_chars:
         raise HTTPException(
@@ -77,12 +90,13 @@ def analyze(payload: AnalyzeRequest):
         )
     if payload.report_type not in settings.accepted_report_types:
         raise HTTPException(status_code=400, detail="Unsupported report_type.")
+    return text
 
-    out = analyzer.run(text, report_type=payload.report_type)
 
+def _analyze_response(report_type: str, out) -> AnalyzeResponse:
     logger.info(
         "Analyzed report | type=%s len=%d sents=%d risk=%s",
-        payload.report_type,
+        report_type,
         len(out.anonymized),
         len(out.sentences),
         out.risk_level,
@@ -90,7 +104,7 @@ def analyze(payload: AnalyzeRequest):
 
     return AnalyzeResponse(
         ok=True,
-        report_type=payload.report_type,
+        report_type=report_type,
         summary=out.summary,
         risk_level=out.risk_level,
         risk_probs=out.risk_probs,
@@ -98,3 +112,21 @@ def analyze(payload: AnalyzeRequest):
         anonymized=out.anonymized,
         meta=out.meta,
     )
+
+
+@app.post("/analyze", response_model=AnalyzeResponse)
+def analyze(payload: AnalyzeRequest):
+    text = _validated_text(payload)
+    out = get_analyzer().run(text, report_type=payload.report_type)
+    return _analyze_response(payload.report_type, out)
+
+
+@app.post("/analyze_batch", response_model=AnalyzeBatchResponse)
+def analyze_batch(payload: AnalyzeBatchRequest):
+    texts = [_validated_text(item) for item in payload.items]
+    report_types = [item.report_type for item in payload.items]
+    outs = get_analyzer().run_batch(texts, report_types=report_types)
+    return AnalyzeBatchResponse(
+        ok=True,
+        results=[_analyze_response(rt, out) for rt, out in zip(report_types, outs)],
+    )
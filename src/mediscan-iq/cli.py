@@ -11,7 +11,7 @@ from .preprocess.anonymizer import anonymize
 from .preprocess.segmenter import split_sentences
 from .services.analyze import Analyzer
 from .nlp.summarizer import Summarizer
-from .nlp.risk_tagger import RiskTagger
+from .nlp.risk_classifier import make_risk_tagger
 
 app = typer.Typer(add_completion=False)
 logger = get_logger("mediscan.cli")
@@ -89,7 +89,7 @@ def risk_cli(
     """Risk-tag a clinical report (anonymize -> risk tagging)."""
     text = file.read_text(encoding="utf-8")
     anon, _ = anonymize(text)
-    tagger = RiskTagger()
+    tagger = make_risk_tagger()
     label, probs, meta = tagger.tag(anon)
     typer.secho("== Risk ==", fg=typer.colors.CYAN, bold=True)
     typer.echo(f"Risk level: {label}")
@@ -1,3 +1,4 @@
+from functools import cached_property
 from typing import List
 from pydantic import Field, PositiveInt, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -15,6 +16,9 @@ class Settings(BaseSettings):
         alias="ACCEPTED_REPORT_TYPES",
     )
 
+    # fastText language-ID model (e.g. lid.176.ftz); empty -> langdetect
+    langid_model_path: str = Field(default="", alias="LANGID_MODEL_PATH")
+
     # ===== Anonymizer config =====
     anonymize_strategy: str = Field(default="hash", alias="ANONYMIZE_STRATEGY")  # mask | hash
     mask_char: str = Field(default="█", alias="MASK_CHAR")
@@ -29,14 +33,26 @@ class Settings(BaseSettings):
     summarizer_num_beams: int = Field(default=4, alias="SUMMARIZER_NUM_BEAMS")
     summarizer_temperature: float = Field(default=0.0, alias="SUMMARIZER_TEMPERATURE")
     summarizer_prompt_style: str = Field(default="radiology_brief", alias="SUMMARIZER_PROMPT_STYLE")
+    summarizer_backend: str = Field(default="torch", alias="SUMMARIZER_BACKEND")  # torch | onnx
+    summarizer_onnx_path: str = Field(default="", alias="SUMMARIZER_ONNX_PATH")  # exported ORT model dir
+    summarizer_batch_size: int = Field(default=8, alias="SUMMARIZER_BATCH_SIZE")  # reports per generate() in batch mode
+    summarizer_half_on_cuda: bool = Field(default=True, alias="SUMMARIZER_HALF_ON_CUDA")  # bf16/fp16 even if INFERENCE_DTYPE=float32
 
+    risk_backend: str = Field(default="nli", alias="RISK_BACKEND")  # nli | embedding | classifier
     risk_nli_model: str = Field(default="facebook/bart-large-mnli", alias="RISK_NLI_MODEL")
+    risk_embed_model: str = Field(default="sentence-transformers/all-MiniLM-L6-v2", alias="RISK_EMBED_MODEL")
+    risk_clf_model: str = Field(default="models/risk_clf", alias="RISK_CLF_MODEL")  # fine-tuned 3-class head
     risk_labels_csv: str = Field(default="low risk,moderate risk,high risk", alias="RISK_LABELS_CSV")
     risk_threshold_high: float = Field(default=0.64, alias="RISK_THRESHOLD_HIGH")
     risk_threshold_moderate: float = Field(default=0.42, alias="RISK_THRESHOLD_MODERATE")
+    nli_quantize: bool = Field(default=False, alias="NLI_QUANTIZE")  # dynamic int8 Linear layers (CPU only)
+    risk_workers: int = Field(default=40, alias="RISK_WORKERS")  # concurrent risk taggings; match request concurrency
 
     # ===== Runtime =====
     device_preference: str = Field(default="auto", alias="DEVICE_PREFERENCE")  # auto|cpu|cuda|mps
+    inference_dtype: str = Field(default="float32", alias="INFERENCE_DTYPE")  # float32|float16|bfloat16|auto
+    torch_compile: bool = Field(default=False, alias="TORCH_COMPILE")
+    use_jit: bool = Field(default=False, alias="USE_JIT")  # compile only the summarizer encoder
 
     # ===== Heuristics / Domain =====
     risk_heuristics_enabled: bool = Field(default=True, alias="RISK_HEURISTICS_ENABLED")
@@ -60,5 +76,11 @@ class Settings(BaseSettings):
             return [t.strip() for t in v.split(",") if t.strip()]
         return v
 
+    # Parsed once per Settings instance instead of on every RiskTagger construction
+    @cached_property
+    def risk_labels(self) -> List[str]:
+        labels = [l.strip() for l in self.risk_labels_csv.split(",") if l.strip()]
+        return labels or ["low risk", "moderate risk", "high risk"]
+
 
 settings = Settings()
@@ -31,19 +31,120 @@ def set_seed(seed: int) -> None:
     if torch.cuda.is_available():
         torch.cuda.manual_seed_all(seed)
 
+_DTYPES = {"float32": torch.float32, "float16": torch.float16, "bfloat16": torch.bfloat16}
+
+def select_dtype(pref: str, device: torch.device) -> torch.dtype:
+    pref = (pref or "float32").lower()
+    if pref == "auto":
+        # half precision halves weight traffic; fp16 for CUDA tensor cores, bf16 elsewhere
+        return torch.float16 if device.type == "cuda" else torch.bfloat16
+    return _DTYPES.get(pref, torch.float32)
+
+def autocast(device: torch.device, model_dtype: torch.dtype):
+    """
+    Mixed-precision context for forwards on CUDA, in INFERENCE_DTYPE's half type. Only fp32
+    weights are autocast: half weights already run in their own dtype, and INFERENCE_DTYPE=float32
+    is the opt-out that keeps a forward in fp32. A no-op on other devices.
+    """
+    dtype = select_dtype(settings.inference_dtype, device)
+    enabled = device.type == "cuda" and model_dtype == torch.float32 and dtype != torch.float32
+    return torch.autocast(device_type=device.type, dtype=dtype, enabled=enabled)
+
 # Small HF loader helpers with safe failover
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM, AutoModelForSequenceClassification
+from transformers import AutoTokenizer, AutoModel, AutoModelForSeq2SeqLM, AutoModelForSequenceClassification
 
-def load_seq2seq(model_name: str, device: torch.device):
-    tok = AutoTokenizer.from_pretrained(model_name)
-    mdl = AutoModelForSeq2SeqLM.from_pretrained(model_name)
-    mdl.to(device)
+# Build the module without random init and stream weights in, so each checkpoint is materialized
+# once (safetensors files are memory-mapped) instead of init + copy: ~half the peak RSS per worker.
+_LOAD_KW = {"low_cpu_mem_usage": True}
+
+def _prepare(mdl, device: torch.device, quantize: bool = False, dtype: torch.dtype | None = None):
+    # Weights are cast; input_ids stay int64 since only floating-point tensors are converted.
+    # Models already loaded in `dtype` are only moved: a blanket .to(dtype) would also cast the
+    # modules HF deliberately keeps in fp32 (`_keep_in_fp32_modules`, e.g. T5's `wo`).
+    dtype = dtype or select_dtype(settings.inference_dtype, device)
+    if mdl.dtype == dtype:
+        mdl.to(device=device)
+    else:
+        mdl.to(device=device, dtype=dtype)
     mdl.eval()
+    if quantize:
+        if device.type == "cpu" and dtype == torch.float32:
+            # int8 weights for every Linear: ~4x fewer bytes per GEMM, activations stay fp32
+            mdl = torch.ao.quantization.quantize_dynamic(mdl, {torch.nn.Linear}, dtype=torch.qint8)
+            logger.info("Dynamic int8 quantization applied to %s", type(mdl).__name__)
+        else:
+            logger.warning("Quantization needs a float32 model on CPU (got %s on %s); skipping", dtype, device)
+    if settings.torch_compile and hasattr(mdl, "compile"):
+        # in-place, so HF helpers such as generate() stay available on the module
+        mdl.compile(mode="reduce-overhead", fullgraph=False)
+        logger.info("torch.compile enabled for %s (%s)", type(mdl).__name__, dtype)
+    return mdl
+
+def load_seq2seq(model_name: str, device: torch.device, backend: str = "torch"):
+    # the Rust tokenizer encodes prompts and batch-decodes outputs in one native call
+    tok = AutoTokenizer.from_pretrained(model_name, use_fast=True)
+    if backend == "onnx":
+        return tok, _load_seq2seq_onnx(settings.summarizer_onnx_path or model_name, device)
+    dtype = select_dtype(settings.inference_dtype, device)
+    if device.type == "cuda" and dtype == torch.float32 and settings.summarizer_half_on_cuda:
+        # decoding is bound by weight and KV-cache reads; bf16 keeps T5's activation range
+        dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+    # Loading in the target dtype (rather than casting afterwards) lets HF keep overflow-prone
+    # layers such as T5's `wo` in fp32, which is what makes the fp16 fallback safe.
+    mdl = AutoModelForSeq2SeqLM.from_pretrained(model_name, torch_dtype=dtype, **_LOAD_KW)
+    if device.type == "cuda" and dtype != torch.float32:
+        _pad_vocab(mdl, multiple=8)
+    mdl = _prepare(mdl, device, dtype=dtype)
+    if settings.use_jit and not settings.torch_compile:
+        # The encoder runs once per generate() on a variable-length prompt, so compile it with
+        # dynamic shapes; the decoder loop stays eager. Compiled in place, so generate() still
+        # gets a regular module (and a ModelOutput) back from get_encoder().
+        mdl.get_encoder().compile(dynamic=True, fullgraph=False)
+        logger.info("torch.compile enabled for %s encoder", type(mdl).__name__)
     return tok, mdl
 
+def _pad_vocab(mdl, multiple: int) -> None:
+    # Tensor cores want GEMM dims in multiples of 8; the output projection is the widest GEMM per
+    # decode step. The extra logits are suppressed so padded ids can never be generated.
+    vocab = mdl.get_output_embeddings().out_features
+    if vocab % multiple == 0:
+        return
+    mdl.resize_token_embeddings(vocab, pad_to_multiple_of=multiple, mean_resizing=False)
+    padded = mdl.get_output_embeddings().out_features
+    gen_cfg = mdl.generation_config
+    gen_cfg.suppress_tokens = list(gen_cfg.suppress_tokens or []) + list(range(vocab, padded))
+    logger.info("Padded %s vocab %d -> %d", type(mdl).__name__, vocab, padded)
+
+def _load_seq2seq_onnx(path: str, device: torch.device):
+    # `path` is a one-time export, e.g.
+    #   optimum-cli export onnx --model google/flan-t5-base --task text2text-generation-with-past t5_onnx/
+    #   optimum-cli onnxruntime quantize --onnx_model t5_onnx/ --avx512_vnni -o t5_onnx_int8/
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM  # optional dependency: mediscan-iq[onnx]
+
+    on_cuda = device.type == "cuda"
+    mdl = ORTModelForSeq2SeqLM.from_pretrained(
+        path,
+        provider="CUDAExecutionProvider" if on_cuda else "CPUExecutionProvider",
+        # IOBinding keeps inputs/outputs (incl. the KV cache) on the GPU between decode steps
+        use_io_binding=on_cuda,
+    )
+    logger.info("Loaded ONNX Runtime seq2seq from %s (io_binding=%s)", path, on_cuda)
+    return mdl
+
 def load_nli(model_name: str, device: torch.device):
     tok = AutoTokenizer.from_pretrained(model_name)
-    mdl = AutoModelForSequenceClassification.from_pretrained(model_name)
-    mdl.to(device)
-    mdl.eval()
+    mdl = AutoModelForSequenceClassification.from_pretrained(model_name, **_LOAD_KW)
+    mdl = _prepare(mdl, device, quantize=settings.nli_quantize)
+    return tok, mdl
+
+def load_classifier(model_name: str, device: torch.device):
+    tok = AutoTokenizer.from_pretrained(model_name)
+    mdl = AutoModelForSequenceClassification.from_pretrained(model_name, **_LOAD_KW)
+    mdl = _prepare(mdl, device)
+    return tok, mdl
+
+def load_encoder(model_name: str, device: torch.device):
+    tok = AutoTokenizer.from_pretrained(model_name)
+    mdl = AutoModel.from_pretrained(model_name, **_LOAD_KW)
+    mdl = _prepare(mdl, device)
     return tok, mdl
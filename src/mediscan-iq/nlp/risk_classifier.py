@@ -0,0 +1,49 @@
+from __future__ import annotations
+from typing import List
+import torch
+from ..config import settings
+from ..logging import get_logger
+from .registry import load_classifier, autocast
+from .risk_tagger import RiskTagger
+
+logger = get_logger("mediscan.nlp.risk_clf")
+
+
+class RiskClassifier(RiskTagger):
+    """
+    Drop-in RiskTagger that scores a report with a fine-tuned sequence classifier
+    (e.g. MiniLM/DistilBERT with a 3-class head saved to RISK_CLF_MODEL).
+    One forward over the premise gives all label probabilities directly: no hypothesis
+    templates and no per-label entailment pairs. Thresholds and heuristic fusion are
+    inherited from RiskTagger.
+    """
+
+    def _load_model(self) -> None:
+        self.tokenizer, self.model = load_classifier(self.cfg.model_name, self.cfg.device)
+        self._label_idx = torch.tensor(self._label_indices(), device=self.cfg.device)
+
+    def _label_indices(self) -> List[int]:
+        # map our labels onto the head's outputs via its id2label; fall back to positional order
+        # for checkpoints saved without label names (LABEL_0, LABEL_1, ...)
+        label2id = {str(v).lower().strip(): int(k) for k, v in self.model.config.id2label.items()}
+        if all(l.lower() in label2id for l in self.cfg.labels):
+            return [label2id[l.lower()] for l in self.cfg.labels]
+        if self.model.config.num_labels != len(self.cfg.labels):
+            raise ValueError(
+                f"classifier has {self.model.config.num_labels} outputs for {len(self.cfg.labels)} labels"
+            )
+        logger.warning("Classifier has no matching id2label; assuming label order %s", self.cfg.labels)
+        return list(range(len(self.cfg.labels)))
+
+    def _model_probs(self, premise: str) -> torch.Tensor:
+        inputs = self.tokenizer(premise, return_tensors="pt", truncation=True).to(self.cfg.device)
+        with autocast(self.cfg.device, self.model.dtype):
+            logits = self.model(**inputs).logits[0]
+        return torch.softmax(logits.float(), dim=-1)[self._label_idx]
+
+
+def make_risk_tagger() -> RiskTagger:
+    """The risk tagger for the configured RISK_BACKEND (nli | embedding | classifier)."""
+    if settings.risk_backend.lower().strip() == "classifier":
+        return RiskClassifier()
+    return RiskTagger()
@@ -1,13 +1,22 @@
 from __future__ import annotations
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Dict, List, Tuple, Optional
+from functools import wraps
+from typing import Callable, Dict, List, Tuple, Optional, TypeVar
+import hashlib
 import re
+import threading
 import torch
 import numpy as np
 from transformers import PreTrainedTokenizerBase, PreTrainedModel
 from ..config import settings
 from ..logging import get_logger
-from .registry import select_device, set_seed, load_nli
+from .registry import select_device, set_seed, load_nli, load_encoder, autocast
+
+try:  # RE2 compiles to a DFA: linear in input length and immune to backtracking blow-ups
+    import re2
+except ImportError:  # pragma: no cover - optional dependency (pip install google-re2)
+    re2 = None
 
 logger = get_logger("mediscan.nlp.risk")
 
@@ -30,6 +39,89 @@ HEURISTIC_PATTERNS = {
     ],
 }
 
+
+def _compile(pattern: str):
+    """Compile with RE2 when installed, falling back to stdlib ``re`` if RE2 rejects the syntax."""
+    # Inline (?i) because RE2's Python binding has no flag constants.
+    pattern = "(?i)" + pattern
+    if re2 is not None:
+        try:
+            return re2.compile(pattern)
+        except re2.error as e:
+            logger.warning("RE2 rejected heuristic pattern, using stdlib re: %s", e)
+    return re.compile(pattern)
+
+
+# One alternation per severity, compiled once: a single scan per text instead of one per pattern.
+_HIGH_RE = _compile("|".join(f"(?:{p})" for p in HEURISTIC_PATTERNS["high"]))
+_MOD_RE = _compile("|".join(f"(?:{p})" for p in HEURISTIC_PATTERNS["moderate"]))
+
+# All patterns as one named-group alternation ("high_0", "moderate_3", ...), so the severity
+# of a match is read off ``m.lastgroup`` and a text is highlighted in a single scan.
+HEURISTIC_RE = _compile(
+    "|".join(
+        f"(?P<{severity}_{i}>{pat})"
+        for severity, patterns in HEURISTIC_PATTERNS.items()
+        for i, pat in enumerate(patterns)
+    )
+)
+
+
+_T = TypeVar("_T")
+
+
+def _digest_cache(maxsize: int) -> Callable[[Callable[[str], _T]], Callable[[str], _T]]:
+    """
+    LRU cache for a function of a report text, keyed by a digest of the text: anonymization
+    can miss PHI, so the report itself is never kept in process memory (as in langid).
+    """
+    def decorate(fn: Callable[[str], _T]) -> Callable[[str], _T]:
+        cache: "OrderedDict[bytes, _T]" = OrderedDict()
+        lock = threading.Lock()
+
+        @wraps(fn)
+        def wrapper(text: str) -> _T:
+            key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+            with lock:
+                if key in cache:
+                    cache.move_to_end(key)
+                    return cache[key]
+            value = fn(text)
+            with lock:
+                cache[key] = value
+                if len(cache) > maxsize:
+                    cache.popitem(last=False)
+            return value
+
+        return wrapper
+
+    return decorate
+
+
+@_digest_cache(maxsize=128)
+def _heuristic_probs(text: str) -> Tuple[Tuple[str, float], ...]:
+    # Repeated analyses of the same report skip the regex scan.
+    # Returns a tuple so the shared cache entry cannot be mutated by callers.
+    # Patterns are case-insensitive, so no lowered copy of the text is needed; the moderate
+    # scan only runs when nothing high-risk matched.
+    high = _HIGH_RE.search(text) is not None
+    moderate = False if high else _MOD_RE.search(text) is not None
+    if high:
+        return (("high risk", 0.85), ("moderate risk", 0.1), ("low risk", 0.05))
+    if moderate:
+        return (("high risk", 0.2), ("moderate risk", 0.6), ("low risk", 0.2))
+    return (("high risk", 0.05), ("moderate risk", 0.25), ("low risk", 0.70))
+
+
+@_digest_cache(maxsize=128)
+def heuristic_spans(text: str) -> Tuple[Tuple[int, int, str], ...]:
+    """Spans of heuristic keywords as (start, end, severity), for UI highlighting."""
+    # finditer yields leftmost, non-overlapping matches, so no overlap pruning is needed.
+    return tuple(
+        (m.start(), m.end(), m.lastgroup.rsplit("_", 1)[0])
+        for m in HEURISTIC_RE.finditer(text)
+    )
+
 @dataclass
 class RiskConfig:
     model_name: str
@@ -38,61 +130,131 @@ class RiskConfig:
     th_mod: float
     device: torch.device
     use_heuristics: bool
+    backend: str = "nli"  # nli | embedding | classifier
+
+# Softmax temperature for cosine similarities of the embedding backend (cosines sit in [-1, 1]).
+EMBED_TEMPERATURE = 0.05
+
+def _hypothesis(label: str) -> str:
+    return f"The clinical case is {label}."
 
 class RiskTagger:
     def __init__(self, cfg: Optional[RiskConfig] = None) -> None:
         set_seed(settings.seed)
         device = select_device(settings.device_preference)
-        label_list = [l.strip() for l in settings.risk_labels_csv.split(",") if l.strip()]
+        backend = settings.risk_backend.lower().strip()
         self.cfg = cfg or RiskConfig(
-            model_name=settings.risk_nli_model,
-            labels=label_list or ["low risk", "moderate risk", "high risk"],
+            model_name={
+                "embedding": settings.risk_embed_model,
+                "classifier": settings.risk_clf_model,
+            }.get(backend, settings.risk_nli_model),
+            labels=list(settings.risk_labels),
             th_high=float(settings.risk_threshold_high),
             th_mod=float(settings.risk_threshold_moderate),
             device=device,
             use_heuristics=bool(settings.risk_heuristics_enabled),
+            backend=backend,
         )
         try:
-            self.tokenizer, self.model = load_nli(self.cfg.model_name, self.cfg.device)
-            logger.info("Loaded NLI model: %s on %s", self.cfg.model_name, self.cfg.device)
+            self._load_model()
+            logger.info("Loaded %s risk model: %s on %s", self.cfg.backend, self.cfg.model_name, self.cfg.device)
             self.nli_ok = True
         except Exception as e:
             logger.warning("RiskTagger falling back to heuristics-only: %s", e)
             self.tokenizer, self.model = None, None
             self.nli_ok = False
 
+    def _load_model(self) -> None:
+        if self.cfg.backend == "classifier":
+            # a 3-class risk head read as NLI would yield meaningless "entailment" scores
+            raise ValueError("RISK_BACKEND=classifier needs RiskClassifier; use make_risk_tagger()")
+        if self.cfg.backend == "embedding":
+            self.tokenizer, self.model = load_encoder(self.cfg.model_name, self.cfg.device)
+            # label side of the bi-encoder never changes: embed it once
+            self._label_emb = self._embed([_hypothesis(l) for l in self.cfg.labels])
+        else:
+            self.tokenizer, self.model = load_nli(self.cfg.model_name, self.cfg.device)
+            self._hyp_parts = self._pretokenize_hypotheses()
+
+    def _pretokenize_hypotheses(self) -> List[Dict[str, Tuple[List[int], List[int]]]]:
+        """
+        Per label, the ids (and token types, if used) around the premise in a pair encoding.
+        Read off a probe encoding, so the special-token layout works for any model family.
+        """
+        probe = "premise"
+        probe_ids = self.tokenizer(probe, add_special_tokens=False)["input_ids"]
+        keys = ["input_ids"]
+        if "token_type_ids" in self.tokenizer.model_input_names:
+            keys.append("token_type_ids")
+        parts = []
+        for label in self.cfg.labels:
+            enc = self.tokenizer(probe, _hypothesis(label))
+            ids = enc["input_ids"]
+            start = next(
+                i for i in range(len(ids)) if ids[i : i + len(probe_ids)] == probe_ids
+            )
+            end = start + len(probe_ids)
+            parts.append({k: (enc[k][:start], enc[k][end:]) for k in keys})
+        return parts
+
     def _heuristic_score(self, text: str) -> Dict[str, float]:
-        text_l = text.lower()
-        high = any(re.search(p, text_l) for p in HEURISTIC_PATTERNS["high"])
-        moderate = any(re.search(p, text_l) for p in HEURISTIC_PATTERNS["moderate"])
-        if high:
-            return {"high risk": 0.85, "moderate risk": 0.1, "low risk": 0.05}
-        if moderate:
-            return {"high risk": 0.2, "moderate risk": 0.6, "low risk": 0.2}
-        return {"high risk": 0.05, "moderate risk": 0.25, "low risk": 0.70}
+        return dict(_heuristic_probs(text))
+
+    @torch.inference_mode()
+    def _embed(self, texts: List[str]) -> torch.Tensor:
+        """L2-normalized mean-pooled sentence embeddings, shape [len(texts), H]."""
+        inputs = self.tokenizer(
+            texts, return_tensors="pt", truncation=True, padding=True
+        ).to(self.cfg.device)
+        with autocast(self.cfg.device, self.model.dtype):
+            hidden = self.model(**inputs).last_hidden_state
+        mask = inputs["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+        pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp_min(1.0)
+        return torch.nn.functional.normalize(pooled.float(), dim=-1)
+
+    def _embedding_probs(self, premise: str) -> torch.Tensor:
+        # one encoder pass for the premise; label embeddings come from the init-time cache
+        sims = self._embed([premise])[0] @ self._label_emb.T
+        return torch.softmax(sims / EMBED_TEMPERATURE, dim=-1)
+
+    def _nli_probs(self, premise: str) -> torch.Tensor:
+        # entailment scoring for all labels in one batched forward pass;
+        # only the premise is tokenized here, hypotheses were tokenized at init
+        premise_ids = self.tokenizer(premise, add_special_tokens=False)["input_ids"]
+        extra = max(len(p["input_ids"][0]) + len(p["input_ids"][1]) for p in self._hyp_parts)
+        premise_ids = premise_ids[: max(1, self.tokenizer.model_max_length - extra)]
+        features: Dict[str, List[List[int]]] = {k: [] for k in self._hyp_parts[0]}
+        for part in self._hyp_parts:
+            for k, (head, tail) in part.items():
+                # the premise is segment A, i.e. token type 0
+                body = premise_ids if k == "input_ids" else [0] * len(premise_ids)
+                features[k].append(head + body + tail)
+        inputs = self.tokenizer.pad(features, return_tensors="pt").to(self.cfg.device)
+        with autocast(self.cfg.device, self.model.dtype):
+            logits = self.model(**inputs).logits
+        # BART MNLI label mapping: [contradiction, neutral, entailment]
+        # We want P(entailment), normalized across labels on-device
+        entail = torch.softmax(logits.float(), dim=-1)[:, 2]
+        return entail / entail.sum().clamp_min(1e-8)
+
+    def _model_probs(self, premise: str) -> torch.Tensor:
+        if self.cfg.backend == "embedding":
+            return self._embedding_probs(premise)
+        return self._nli_probs(premise)
 
     @torch.inference_mode()
     def tag(self, text: str) -> Tuple[str, Dict[str, float], Dict[str, str]]:
+        if self.nli_ok:
+            premise = text[:2000]  # keep it short for stability
+            # both paths return probabilities already normalized across labels, still on device.
+            # On CUDA the kernels are only queued here, so the heuristic scan below runs on the
+            # CPU while the forward executes; the .cpu() afterwards is the single sync point.
+            pending = self._model_probs(premise)
+
         base_probs = self._heuristic_score(text) if self.cfg.use_heuristics else None
 
         if self.nli_ok:
-            # entailment scoring for each label using hypothesis templates
-            probs = {}
-            for label in self.cfg.labels:
-                premise = text[:2000]  # keep it short for stability
-                hypothesis = f"The clinical case is {label}."
-                inputs = self.tokenizer(
-                    premise, hypothesis, return_tensors="pt", truncation=True
-                ).to(self.cfg.device)
-                logits = self.model(**inputs).logits[0]
-                # BART MNLI label mapping: [contradiction, neutral, entailment]
-                # We want P(entailment)
-                entail = torch.softmax(logits, dim=-1)[2].item()
-                probs[label] = float(entail)
-
-            # normalize
-            s = sum(probs.values()) or 1.0
-            probs = {k: v / s for k, v in probs.items()}
+            probs = dict(zip(self.cfg.labels, pending.cpu().tolist()))
         else:
             probs = base_probs or {"low risk": 1.0}
 
@@ -111,6 +273,7 @@ class RiskTagger:
 
         meta = {
             "model": self.cfg.model_name if self.nli_ok else "heuristics-only",
+            "backend": self.cfg.backend if self.nli_ok else "heuristics",
             "heuristics": str(self.cfg.use_heuristics),
             "labels": ",".join(self.cfg.labels),
         }
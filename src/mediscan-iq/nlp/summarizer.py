@@ -1,9 +1,10 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 import math
 import re
 
+import numpy as np
 import torch
 from transformers import PreTrainedTokenizerBase, PreTrainedModel
 from ..config import settings
@@ -29,6 +30,11 @@ PROMPTS: Dict[str, str] = {
     ),
 }
 
+# Compiled once at import; used on every summary.
+_WS_RE = re.compile(r"\s+")
+_LABEL_RE = re.compile(r"^(SUMMARY|FINDINGS|IMPRESSION)[:\-]\s*", re.I)
+_SENT_RE = re.compile(r"(?<=[.!?])\s+")
+
 @dataclass
 class SummarizationConfig:
     model_name: str
@@ -38,6 +44,8 @@ class SummarizationConfig:
     temperature: float
     prompt_style: str
     device: torch.device
+    backend: str = "torch"  # torch | onnx
+    batch_size: int = 8
 
 class Summarizer:
     def __init__(self, cfg: Optional[SummarizationConfig] = None) -> None:
@@ -51,72 +59,165 @@ class Summarizer:
             temperature=settings.summarizer_temperature,
             prompt_style=settings.summarizer_prompt_style,
             device=device,
+            backend=settings.summarizer_backend.lower().strip(),
+            batch_size=settings.summarizer_batch_size,
         )
+        # `{input}` is the templates' only placeholder: split once instead of format() per call
+        tpl = PROMPTS.get(self.cfg.prompt_style, PROMPTS["generic_clinical"])
+        self._prompt_prefix, self._prompt_suffix = tpl.split("{input}")
         try:
-            self.tokenizer, self.model = load_seq2seq(self.cfg.model_name, self.cfg.device)
-            logger.info("Loaded summarizer: %s on %s", self.cfg.model_name, self.cfg.device)
+            self.tokenizer, self.model = load_seq2seq(
+                self.cfg.model_name, self.cfg.device, backend=self.cfg.backend
+            )
+            logger.info("Loaded %s summarizer: %s on %s", self.cfg.backend, self.cfg.model_name, self.cfg.device)
             self.abstractive_ok = True
         except Exception as e:
             logger.warning("Falling back to extractive summarizer: %s", e)
             self.tokenizer, self.model = None, None
             self.abstractive_ok = False
+        # Prompts are never longer than max_input_tokens and never padded, so every attention
+        # mask is a prefix of one all-ones row; it is only read, so concurrent requests share it.
+        self._mask_buf = torch.ones(1, self.cfg.max_input_tokens, dtype=torch.long, device=self.cfg.device)
+        if self.abstractive_ok and self.cfg.backend == "torch" and (settings.use_jit or settings.torch_compile):
+            try:
+                self._warmup()
+            except Exception as e:
+                # e.g. Inductor without a C++ toolchain: a compile failure must not take the whole
+                # Analyzer down (and be retried, models and all, on every request)
+                logger.warning("Summarizer compile failed, running eager: %s", e)
+                self._uncompile()
+
+    def _uncompile(self) -> None:
+        # nn.Module.compile() works in place by setting _compiled_call_impl; clearing it restores
+        # the eager forward. Without that hook there is no eager path left, so go extractive.
+        modules = [self.model, self.model.get_encoder()]
+        if all(hasattr(m, "_compiled_call_impl") for m in modules):
+            for m in modules:
+                m._compiled_call_impl = None
+        else:
+            self.tokenizer, self.model = None, None
+            self.abstractive_ok = False
+
+    @torch.inference_mode()
+    def _warmup(self) -> None:
+        # Compilation is lazy: trigger it here so the first real request doesn't pay for it.
+        # The encoder is compiled with dynamic shapes, so one prompt length covers the rest.
+        ids = torch.tensor([self._truncate_by_tokens(self._prompt("No acute findings."))], device=self.cfg.device)
+        self._generate({"input_ids": ids, "attention_mask": self._mask_buf[:, : ids.shape[1]]})
+        logger.info("Summarizer warmed up (%d prompt tokens)", ids.shape[1])
 
     def _prompt(self, text: str) -> str:
-        tpl = PROMPTS.get(self.cfg.prompt_style, PROMPTS["generic_clinical"])
-        return tpl.format(input=text)
-
-    def _truncate_by_tokens(self, text: str) -> str:
-        if not self.abstractive_ok:
-            return text
-        tokens = self.tokenizer.encode(text, add_special_tokens=False)
-        if len(tokens) <= self.cfg.max_input_tokens:
-            return text
+        return self._prompt_prefix + text + self._prompt_suffix
+
+    def _truncate_by_tokens(self, text: str) -> List[int]:
+        """
+        Token ids of `text`, special tokens included, fitted to the input budget by keeping
+        head + tail windows of the body. Tokenized once; the ids feed generate() directly.
+        """
+        ids = self.tokenizer(text)["input_ids"]
+        limit = min(self.cfg.max_input_tokens, self.tokenizer.model_max_length)
+        if len(ids) <= limit:
+            return ids
+        # special tokens (BOS/EOS) sit at the ends and are kept; only the body is cut.
+        # The mask is only requested here, since most notes fit and never reach this point. It
+        # has to come from the encoder: get_special_tokens_mask() on ids would also flag <unk>
+        # tokens of the text itself, pushing them outside the budget.
+        special = self.tokenizer(text, return_special_tokens_mask=True)["special_tokens_mask"]
+        lead = next((i for i, m in enumerate(special) if not m), len(ids))
+        trail = next((i for i, m in enumerate(reversed(special)) if not m), 0)
+        body = ids[lead : len(ids) - trail]
+        budget = max(1, limit - (len(ids) - len(body)))
         # keep head + tail windows
-        head = math.floor(self.cfg.max_input_tokens * 0.6)
-        tail = self.cfg.max_input_tokens - head
-        trunc = tokens[:head] + tokens[-tail:]
-        return self.tokenizer.decode(trunc)
+        head = math.floor(budget * 0.6)
+        tail = budget - head
+        return ids[:lead] + body[:head] + body[len(body) - tail :] + ids[len(ids) - trail :]
 
     @torch.inference_mode()
     def summarize(self, text: str, report_type: str) -> Tuple[str, Dict[str, str]]:
         clean = text.strip()
-        clean = re.sub(r"\s+", " ", clean)
+        clean = _WS_RE.sub(" ", clean)
         if len(clean) < 20:
             return clean, {"mode": "passthrough", "reason": "short_text"}
 
         if self.abstractive_ok:
             prompt = self._prompt(clean)
-            trunc = self._truncate_by_tokens(prompt)
-            inputs = self.tokenizer(trunc, return_tensors="pt", truncation=True).to(self.cfg.device)
-
-            gen = self.model.generate(
-                **inputs,
-                max_new_tokens=self.cfg.max_output_tokens,
-                num_beams=self.cfg.num_beams,
-                do_sample=self.cfg.temperature > 0.0,
-                temperature=max(1e-6, self.cfg.temperature),
-                length_penalty=1.0,
-                early_stopping=True,
-                no_repeat_ngram_size=3,
-            )
-            out = self.tokenizer.decode(gen[0], skip_special_tokens=True).strip()
-            out = _post_summarize(out)
-            return out, {
-                "mode": "abstractive",
-                "model": self.cfg.model_name,
-                "report_type": report_type,
-            }
+            input_ids = torch.tensor([self._truncate_by_tokens(prompt)], device=self.cfg.device)
+            inputs = {"input_ids": input_ids, "attention_mask": self._mask_buf[:, : input_ids.shape[1]]}
+
+            gen = self._generate(inputs)
+            # batch_decode runs the id->text join in the fast tokenizer, without a gen[0] view
+            out = self.tokenizer.batch_decode(gen, skip_special_tokens=True)[0].strip()
+            return _post_summarize(out), self._abstractive_meta(report_type)
 
         # Fallback: simple extractive scoring (position + length + keyword boosts)
         out = extractive_summary(clean)
         return out, {"mode": "extractive", "report_type": report_type, "model": "fallback"}
 
+    @torch.inference_mode()
+    def summarize_batch(self, texts: List[str], report_types: List[str]) -> List[Tuple[str, Dict[str, str]]]:
+        """
+        Summarize several reports, sharing generate() calls across them.
+        Returns one (summary, meta) per input, in input order.
+        """
+        results: List[Optional[Tuple[str, Dict[str, str]]]] = [None] * len(texts)
+        pending: List[Tuple[int, List[int]]] = []  # (input index, prompt token ids)
+        for i, (text, report_type) in enumerate(zip(texts, report_types)):
+            clean = _WS_RE.sub(" ", text.strip())
+            if len(clean) < 20 or not self.abstractive_ok:
+                results[i] = self.summarize(clean, report_type=report_type)
+                continue
+            pending.append((i, self._truncate_by_tokens(self._prompt(clean))))
+
+        # length-sorted batches keep padding (and wasted beam compute) to a minimum
+        pending.sort(key=lambda item: len(item[1]))
+        for start in range(0, len(pending), max(1, self.cfg.batch_size)):
+            chunk = pending[start : start + max(1, self.cfg.batch_size)]
+            inputs = self.tokenizer.pad(
+                {"input_ids": [ids for _, ids in chunk]}, return_tensors="pt"
+            ).to(self.cfg.device)
+            gen = self._generate(inputs)
+            outs = self.tokenizer.batch_decode(gen, skip_special_tokens=True)
+            for (i, _), out in zip(chunk, outs):
+                results[i] = (_post_summarize(out.strip()), self._abstractive_meta(report_types[i]))
+        return results
+
+    def _generate(self, inputs) -> torch.Tensor:
+        # No autocast here: load_seq2seq already picked the weights' dtype (fp32 only when the user
+        # opted out of half precision), and autocasting fp16 would also run the fp32-kept T5 `wo`
+        # projections in fp16.
+        if self.cfg.backend == "torch":
+            # run the encoder once up front; generate() expands its outputs across beams and
+            # the decoder reuses them (plus its own K/V cache) at every step
+            encoder_outputs = self.model.get_encoder()(
+                input_ids=inputs["input_ids"], attention_mask=inputs["attention_mask"], return_dict=True
+            )
+            inputs = {"encoder_outputs": encoder_outputs, "attention_mask": inputs["attention_mask"]}
+        return self.model.generate(
+            **inputs,
+            use_cache=True,
+            max_new_tokens=self.cfg.max_output_tokens,
+            num_beams=self.cfg.num_beams,
+            do_sample=self.cfg.temperature > 0.0,
+            temperature=max(1e-6, self.cfg.temperature),
+            length_penalty=1.0,
+            early_stopping=True,
+            no_repeat_ngram_size=3,
+        )
+
+    def _abstractive_meta(self, report_type: str) -> Dict[str, str]:
+        return {
+            "mode": "abstractive",
+            "model": self.cfg.model_name,
+            "backend": self.cfg.backend,
+            "report_type": report_type,
+        }
+
 def _post_summarize(text: str) -> str:
     # Normalize whitespace and cut trailing labels
-    text = re.sub(r"\s+", " ", text).strip()
-    text = re.sub(r"^(SUMMARY|FINDINGS|IMPRESSION)[:\-]\s*", "", text, flags=re.I)
+    text = _WS_RE.sub(" ", text).strip()
+    text = _LABEL_RE.sub("", text)
     # Ensure 2-3 sentences tops
-    sents = re.split(r"(?<=[.!?])\s+", text)
+    sents = _SENT_RE.split(text)
     sents = [s.strip() for s in sents if s.strip()]
     return " ".join(sents[:3])
 
@@ -126,19 +227,43 @@ KEY_BOOSTS = {
     "fracture": 1.6, "ischemia": 1.7, "embolism": 1.8,
 }
 
+# One case-insensitive scan finds every boost keyword in a sentence. The lookahead makes
+# matches zero-width, so overlapping keywords are all reported, like `k in s.lower()` would.
+_KEY_RE = re.compile("(?=(" + "|".join(map(re.escape, KEY_BOOSTS)) + "))", re.I)
+
 def extractive_summary(text: str, max_sents: int = 3) -> str:
     # Naive extractor: split sentences, score by tf-ish + keyword boosts + position decay
-    sents = re.split(r"(?<=[.!?])\s+", text)
+    sents = _SENT_RE.split(text)
     sents = [s.strip() for s in sents if len(s.strip()) > 3]
     if not sents:
         return text
 
-    def score(idx: int, s: str) -> float:
-        base = math.log(len(s.split()) + 1)
-        pos = 1.0 / (1.0 + idx * 0.15)
-        boost = 1.0 + sum(wt for k, wt in KEY_BOOSTS.items() if k in s.lower()) * 0.15
-        return base * pos * boost
+    def boost(s: str) -> float:
+        hits = {m.group(1).lower() for m in _KEY_RE.finditer(s)}
+        # summed in KEY_BOOSTS order, not set order, so scores don't vary with PYTHONHASHSEED
+        return 1.0 + sum(wt for k, wt in KEY_BOOSTS.items() if k in hits) * 0.15
+
+    # score = log(words + 1) * position decay * keyword boost, computed as whole arrays
+    n = len(sents)
+    words = np.fromiter((len(s.split()) for s in sents), dtype=np.float64, count=n)
+    boosts = np.fromiter((boost(s) for s in sents), dtype=np.float64, count=n)
+    scores = np.log1p(words) / (1.0 + 0.15 * np.arange(n)) * boosts
+
+    return " ".join(sents[i] for i in _top_k(scores, max_sents))
 
-    scored = sorted(((score(i, s), s) for i, s in enumerate(sents)), reverse=True)
-    top = [s for _, s in scored[:max_sents]]
-    return " ".join(top)
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first; equal scores keep the earlier index first."""
+    n = len(scores)
+    k = max(0, min(k, n))
+    if k == 0:
+        return np.empty(0, dtype=np.intp)
+    # O(n) selection, then only the k winners are sorted. Scores tied with the k-th one are
+    # taken earliest-first; a bare argpartition would pick among them arbitrarily.
+    if k < n:
+        kth = -np.partition(-scores, k - 1)[k - 1]
+        above = np.flatnonzero(scores > kth)
+        top = np.concatenate([above, np.flatnonzero(scores == kth)[: k - len(above)]])
+        top.sort()
+    else:
+        top = np.arange(n)
+    return top[np.argsort(-scores[top], kind="stable")]
@@ -1,6 +1,7 @@
 from __future__ import annotations
 import hashlib
-import regex as re
+import re
+from functools import lru_cache
 from typing import Iterable, Tuple, Dict
 from ..config import settings
 
@@ -15,20 +16,50 @@ PATTERNS: Dict[str, re.Pattern] = {
     "address_like": re.compile(r"\b\d{1,5}\s+[A-Z][A-Za-z]+\s(?:St|Street|Ave|Avenue|Rd|Road|Blvd|Boulevard|Ln|Lane)\b", re.I),
 }
 
+@lru_cache(maxsize=4)
+def _salted_hasher(salt: str) -> "hashlib.blake2b":
+    # BLAKE2b keyed with the salt (a MAC, not salt-prefixing); 5-byte digest = 10 hex chars.
+    # Keys are capped at 64 bytes, so longer salts are first reduced to a 64-byte digest.
+    key = salt.encode("utf-8")
+    if len(key) > hashlib.blake2b.MAX_KEY_SIZE:
+        key = hashlib.blake2b(key).digest()
+    return hashlib.blake2b(key=key, digest_size=5)
+
 def _hash_token(token: str) -> str:
-    h = hashlib.sha256((settings.hash_salt + token).encode("utf-8")).hexdigest()[:10]
-    return f"<ID:{h}>"
+    # copy() reuses the keyed state instead of re-absorbing the key block per token
+    h = _salted_hasher(settings.hash_salt).copy()
+    h.update(token.encode("utf-8"))
+    return f"<ID:{h.hexdigest()}>"
+
+# Keyed on the length only (never the PHI itself); the mask char is part of the key so a
+# settings change never serves stale masks.
+@lru_cache(maxsize=64)
+def _mask(mask_char: str, length: int) -> str:
+    return mask_char * max(6, length)
 
 def _mask_token(token: str) -> str:
-    return settings.mask_char * max(6, len(token))
+    return _mask(settings.mask_char, len(token))
 
-def _replace(text: str, pattern: re.Pattern, strategy: str) -> str:
-    def repl(m: re.Match) -> str:
-        token = m.group(0)
-        if strategy == "hash":
-            return _hash_token(token)
-        return _mask_token(token)
-    return pattern.sub(repl, text)
+# Every pattern except name_hint needs a digit or an "@" to match at all.
+_LETTERS_ONLY = ("name_hint",)
+_TRIGGER_RE = re.compile(r"[\d@]")
+
+_HSPACE_RE = re.compile(r"[ \t]+")
+_NEWLINE_RE = re.compile(r"\s*\n\s*")
+
+@lru_cache(maxsize=4)
+def _master(keep_dates: bool, letters_only: bool = False) -> re.Pattern:
+    # All PHI patterns fused into one named-group alternation so a note is scanned once.
+    # Flags are scoped per group, since only some patterns are case-insensitive.
+    parts = []
+    for name, pattern in PATTERNS.items():
+        if name == "date" and keep_dates:
+            continue
+        if letters_only and name not in _LETTERS_ONLY:
+            continue
+        body = f"(?i:{pattern.pattern})" if pattern.flags & re.I else pattern.pattern
+        parts.append(f"(?P<{name}>{body})")
+    return re.compile("|".join(parts))
 
 def anonymize(text: str) -> Tuple[str, Dict[str, int]]:
     """
@@ -38,18 +69,32 @@ def anonymize(text: str) -> Tuple[str, Dict[str, int]]:
     strategy = settings.anonymize_strategy.lower().strip()
     keep_dates = bool(settings.keep_dates)
 
-    out = text
+    token_fn = _hash_token if strategy == "hash" else _mask_token
 
-    for name, pattern in PATTERNS.items():
-        if name == "date" and keep_dates:
-            continue
-        before = out
-        out = _replace(out, pattern, strategy=strategy)
-        if out != before:
-            counts[name] = counts.get(name, 0) + len(list(pattern.finditer(before)))
+    # Narrative text with no digit and no "@" can only hit name_hint; skip the rest.
+    letters_only = _TRIGGER_RE.search(text) is None
+
+    # Unmatched slices and replacement tokens are collected and joined once; the note is
+    # copied a single time however many PHI spans it has. Repeated identifiers (the same MRN
+    # or name) are replaced once per call; the memo dies with the call, so no PHI outlives it.
+    replaced: Dict[str, str] = {}
+    parts = []
+    pos = 0
+    for m in _master(keep_dates, letters_only).finditer(text):
+        name = m.lastgroup
+        counts[name] = counts.get(name, 0) + 1
+        token = m.group(0)
+        rep = replaced.get(token)
+        if rep is None:
+            rep = replaced[token] = token_fn(token)
+        parts.append(text[pos:m.start()])
+        parts.append(rep)
+        pos = m.end()
+    parts.append(text[pos:])
+    out = "".join(parts)
 
     if settings.reduce_whitespace:
-        out = re.sub(r"[ \t]+", " ", out)
-        out = re.sub(r"\s*\n\s*", "\n", out).strip()
+        out = _HSPACE_RE.sub(" ", out)
+        out = _NEWLINE_RE.sub("\n", out).strip()
 
     return out, counts
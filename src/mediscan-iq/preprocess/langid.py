@@ -0,0 +1,83 @@
+from __future__ import annotations
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional
+
+from langdetect import DetectorFactory, detect
+
+from ..config import settings
+from ..logging import get_logger
+
+try:  # fastText LID (C++), much faster than langdetect's pure-Python n-gram model
+    import fasttext
+except ImportError:  # pragma: no cover - optional dependency (pip install fasttext-wheel)
+    fasttext = None
+
+DetectorFactory.seed = 42
+
+logger = get_logger("mediscan.preprocess.langid")
+
+# A prefix is plenty to identify the language and bounds the cost on long notes.
+_PREFIX_CHARS = 1024
+_CACHE_SIZE = 1024
+
+# Keyed by a digest of the prefix, so raw (pre-anonymization) text is never kept in memory.
+_cache: "OrderedDict[bytes, Optional[str]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+# Set after the first fastText failure so a broken model is not retried on every request.
+_fasttext_disabled = False
+
+
+@lru_cache(maxsize=1)
+def _fasttext_model():
+    path = settings.langid_model_path
+    if not path or fasttext is None:
+        return None
+    try:
+        return fasttext.load_model(path)
+    except Exception as e:
+        logger.warning("fastText LID model unavailable, using langdetect: %s", e)
+        return None
+
+
+def _detect(text: str) -> Optional[str]:
+    global _fasttext_disabled
+    model = None if _fasttext_disabled else _fasttext_model()
+    if model is not None:
+        try:
+            # The C++ binding directly: the Python wrapper's predict() ends in
+            # np.array(..., copy=False), which raises on NumPy 2. Like the wrapper, it feeds the
+            # binding exactly one newline-terminated line.
+            preds = model.f.predict(text.replace("\n", " ") + "\n", 1, 0.0, "strict")
+            return preds[0][1].replace("__label__", "") if preds else None
+        except Exception as e:
+            _fasttext_disabled = True
+            logger.warning("fastText predict failed, using langdetect from now on: %s", e)
+    try:
+        return detect(text)
+    except Exception:
+        return None
+
+
+def detect_language(text: str) -> Optional[str]:
+    """
+    ISO language code of `text` (None if undetectable), from its first characters.
+    Uses fastText when LANGID_MODEL_PATH points at e.g. lid.176.ftz, else langdetect.
+    """
+    prefix = text[:_PREFIX_CHARS]
+    key = hashlib.blake2b(prefix.encode("utf-8"), digest_size=8).digest()
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    lang = _detect(prefix)
+
+    with _cache_lock:
+        _cache[key] = lang
+        if len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return lang
@@ -1,15 +1,27 @@
-from typing import List
+from functools import lru_cache
+from typing import List, Optional
 import re
 import nltk
 
-# Ensure punkt is available (one-time download if missing).
+# Ensure punkt is available (one-time download if missing). NLTK >= 3.9 loads the
+# pickle-free "punkt_tab" tables rather than the old "punkt" pickles.
 try:
-    nltk.data.find("tokenizers/punkt")
+    nltk.data.find("tokenizers/punkt_tab")
 except LookupError:  # pragma: no cover
-    nltk.download("punkt")
+    nltk.download("punkt_tab")
 
 _SENT_SPLIT_FALLBACK = re.compile(r"(?<!\w\.\w.)(?<![A-Z][a-z]\.)(?<=\.|\?)\s")
 
+
+@lru_cache(maxsize=1)
+def _punkt() -> Optional["nltk.tokenize.PunktTokenizer"]:
+    # Loaded once per process; every call is then a plain tokenize() on the same instance.
+    try:
+        from nltk.tokenize import PunktTokenizer
+        return PunktTokenizer("english")
+    except Exception:
+        return None
+
 def split_sentences(text: str) -> List[str]:
     """
     Robust sentence splitter with NLTK punkt (fallback to regex).
@@ -17,12 +29,14 @@ def split_sentences(text: str) -> List[str]:
     """
     if not text.strip():
         return []
-    try:
-        from nltk.tokenize import sent_tokenize
-        sents = sent_tokenize(text)
-        # Filter very short artifacts
-        return [s.strip() for s in sents if len(s.strip()) > 1]
-    except Exception:
-        # Conservative regex fallback
-        sents = _SENT_SPLIT_FALLBACK.split(text)
-        return [s.strip() for s in sents if s.strip()]
+    punkt = _punkt()
+    if punkt is not None:
+        try:
+            sents = punkt.tokenize(text)
+            # Filter very short artifacts
+            return [s.strip() for s in sents if len(s.strip()) > 1]
+        except Exception:
+            pass
+    # Conservative regex fallback
+    sents = _SENT_SPLIT_FALLBACK.split(text)
+    return [s.strip() for s in sents if s.strip()]
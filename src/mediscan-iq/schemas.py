@@ -34,3 +34,12 @@ class AnalyzeResponse(BaseModel):
     sentences: List[str]
     anonymized: str
     meta: Dict[str, str] = {}
+
+
+class AnalyzeBatchRequest(BaseModel):
+    items: List[AnalyzeRequest] = Field(..., min_length=1, max_length=32, description="Reports to analyze")
+
+
+class AnalyzeBatchResponse(BaseModel):
+    ok: bool = True
+    results: List[AnalyzeResponse]
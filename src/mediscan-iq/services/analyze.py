@@ -1,11 +1,15 @@
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+import torch
+from ..config import settings
 from ..logging import get_logger
 from ..preprocess.anonymizer import anonymize
 from ..preprocess.segmenter import split_sentences
 from ..nlp.summarizer import Summarizer
-from ..nlp.risk_tagger import RiskTagger
+from ..nlp.risk_tagger import heuristic_spans
+from ..nlp.risk_classifier import make_risk_tagger
 
 logger = get_logger("mediscan.services.analyze")
 
@@ -17,22 +21,66 @@ class AnalysisOutput:
     sentences: List[str]
     anonymized: str
     meta: Dict[str, str]
+    # (start, end, severity) keyword spans over `anonymized`, so the UI need not rescan it
+    hl_spans: List[Tuple[int, int, str]] = field(default_factory=list)
 
 class Analyzer:
     def __init__(self) -> None:
         self.summarizer = Summarizer()
-        self.risk = RiskTagger()
+        self.risk = make_risk_tagger()
+        # Risk tagging only reads the anonymized text, so it runs on a worker while the calling
+        # thread summarizes; torch kernels release the GIL, so the two overlap. One worker per
+        # in-flight request (FastAPI runs sync endpoints on 40 threads by default), so requests
+        # never queue behind each other's risk forwards; threads are only spawned on demand.
+        self._risk_pool = ThreadPoolExecutor(
+            max_workers=max(1, settings.risk_workers), thread_name_prefix="mediscan-risk"
+        )
 
+    @torch.inference_mode()
     def run(self, text: str, report_type: str) -> AnalysisOutput:
         # Step-1 reuse: anonymize + sentence split
+        anonym, counts, sents = self._preprocess(text, report_type)
+
+        # Step-2: summarization + risk, concurrently
+        risk = self._risk_pool.submit(self._tag_risk, anonym)
+        summary, s_meta = self.summarizer.summarize(anonym, report_type=report_type)
+        return self._finish(anonym, counts, sents, summary, s_meta, risk.result())
+
+    @torch.inference_mode()
+    def run_batch(self, texts: List[str], report_types: List[str]) -> List[AnalysisOutput]:
+        """Like run() for several reports; summaries are generated in shared batches."""
+        pre = [self._preprocess(t, rt) for t, rt in zip(texts, report_types)]
+        # the whole batch is tagged in one task, so a batch holds one worker like a single request
+        risks = self._risk_pool.submit(lambda: [self._tag_risk(anonym) for anonym, _, _ in pre])
+        summaries = self.summarizer.summarize_batch([anonym for anonym, _, _ in pre], report_types)
+        return [
+            self._finish(anonym, counts, sents, summary, s_meta, risk)
+            for (anonym, counts, sents), (summary, s_meta), risk in zip(pre, summaries, risks.result())
+        ]
+
+    # inference_mode is thread-local: the caller's run()/run_batch() context does not reach the
+    # risk worker, so the whole tagging call (not just its model forward) enters it here.
+    @torch.inference_mode()
+    def _tag_risk(self, anonym: str) -> Tuple[str, Dict[str, float], Dict[str, str]]:
+        return self.risk.tag(anonym)
+
+    def _preprocess(self, text: str, report_type: str) -> Tuple[str, Dict[str, int], List[str]]:
         anonym, counts = anonymize(text)
         sents = split_sentences(anonym)
         logger.info("Analyze: anonymized=%d chars | sents=%d | type=%s",
                     len(anonym), len(sents), report_type)
+        return anonym, counts, sents
 
-        # Step-2: summarization + risk
-        summary, s_meta = self.summarizer.summarize(anonym, report_type=report_type)
-        risk_label, probs, r_meta = self.risk.tag(anonym)
+    def _finish(
+        self,
+        anonym: str,
+        counts: Dict[str, int],
+        sents: List[str],
+        summary: str,
+        s_meta: Dict[str, str],
+        risk: Tuple[str, Dict[str, float], Dict[str, str]],
+    ) -> AnalysisOutput:
+        risk_label, probs, r_meta = risk
 
         meta = {}
         meta.update({f"phi_{k}": str(v) for k, v in counts.items()})
@@ -46,4 +94,5 @@ class Analyzer:
             sentences=sents,
             anonymized=anonym,
             meta=meta,
+            hl_spans=list(heuristic_spans(anonym)),
         )
@@ -0,0 +1,15 @@
+import importlib.util
+import sys
+from pathlib import Path
+
+# The sources live in src/mediscan-iq, which is not an importable name; expose them as the
+# `mediscan_iq` package the code and tests import, unless an installed copy already is.
+_SRC = Path(__file__).resolve().parents[1] / "src" / "mediscan-iq"
+
+if importlib.util.find_spec("mediscan_iq") is None:
+    spec = importlib.util.spec_from_file_location(
+        "mediscan_iq", _SRC / "__init__.py", submodule_search_locations=[str(_SRC)]
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["mediscan_iq"] = module
+    spec.loader.exec_module(module)
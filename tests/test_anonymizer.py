@@ -1,16 +1,85 @@
-from mediscan_iq.preprocess.anonymizer import anonymize
+import hashlib
 
-def test_email_phone_masking()
-    raw = Patient Mr. John Doe email john.doe@hospital.org, phone +1 415-555-0199. MRN 12345678.
+import pytest
+
+from mediscan_iq.config import settings
+from mediscan_iq.preprocess.anonymizer import _master, anonymize
+
+
+@pytest.fixture(autouse=True)
+def default_anonymizer_settings(monkeypatch):
+    monkeypatch.setattr(settings, "anonymize_strategy", "hash")
+    monkeypatch.setattr(settings, "hash_salt", "mediscan")
+    monkeypatch.setattr(settings, "keep_dates", False)
+    monkeypatch.setattr(settings, "reduce_whitespace", True)
+
+
+def test_email_phone_masking():
+    raw = "Patient Mr. John Doe email john.doe@hospital.org, phone +1 415-555-0199. MRN 12345678."
     out, counts = anonymize(raw)
-    assert john.doe@hospital.org not in out
-    assert +1 415-555-0199 not in out
-    assert counts.get(email, 0) = 1
-    assert counts.get(phone, 0) = 1
-    assert counts.get(mrn, 0) = 1
-
-def test_whitespace_reduction()
-    raw = Line 1   n   Line 2
+    assert "john.doe@hospital.org" not in out
+    assert "+1 415-555-0199" not in out
+    assert counts.get("email", 0) == 1
+    assert counts.get("phone", 0) == 1
+    assert counts.get("mrn", 0) == 1
+
+def test_whitespace_reduction():
+    raw = "Line 1   \n   Line 2"
     out, _ = anonymize(raw)
-    assert    not in out
-    assert out.splitlines() == [Line 1, Line 2]
+    assert "   " not in out
+    assert out.splitlines() == ["Line 1", "Line 2"]
+
+def test_leftmost_match_takes_whole_span():
+    # one fused scan: "MRN 12345678" is a single mrn token, not "MRN" plus phone digits,
+    # and SSNs/dates are not partly eaten by the phone pattern
+    out, counts = anonymize("MRN 12345678. SSN 123-45-6789 seen 03/14/2024 at 12 Main Street.")
+    assert "MRN" not in out
+    assert counts == {"mrn": 1, "ssn_like": 1, "date": 1, "address_like": 1}
+
+def test_keep_dates(monkeypatch):
+    raw = "SSN 123-45-6789 seen 03/14/2024 and Jan 5, 2024."
+    _, counts = anonymize(raw)
+    assert counts == {"ssn_like": 1, "date": 2}
+
+    monkeypatch.setattr(settings, "keep_dates", True)
+    out, counts = anonymize(raw)
+    assert "03/14/2024" in out and "Jan 5, 2024" in out
+    assert counts == {"ssn_like": 1}
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        "Seen by Dr. Smith. No acute distress.",
+        "Patient John Doe reviewed with Dr. Jane Roe; Ms. Park informed.",
+        "No acute cardiopulmonary abnormality.",
+    ],
+)
+def test_letters_only_notes_match_full_scan(raw):
+    # without a digit or "@" only name_hint can match, so the reduced pattern finds the same spans
+    full = [(m.lastgroup, m.span()) for m in _master(False).finditer(raw)]
+    reduced = [(m.lastgroup, m.span()) for m in _master(False, True).finditer(raw)]
+    assert reduced == full
+    _, counts = anonymize(raw)
+    assert set(counts) <= {"name_hint"}
+
+def test_hash_is_stable_keyed_blake2b():
+    out, _ = anonymize("Seen by Dr. Smith, then Dr. Smith again.")
+    expected = hashlib.blake2b(b"Dr. Smith", key=b"mediscan", digest_size=5).hexdigest()
+    assert expected == "4990462b5a"
+    assert out == f"Seen by <ID:{expected}>, then <ID:{expected}> again."
+
+def test_hash_depends_on_salt(monkeypatch):
+    first, _ = anonymize("Dr. Smith")
+    monkeypatch.setattr(settings, "hash_salt", "other-salt")
+    second, _ = anonymize("Dr. Smith")
+    assert first != second
+    # salts longer than BLAKE2b's 64-byte key limit are accepted too
+    monkeypatch.setattr(settings, "hash_salt", "s" * 100)
+    third, _ = anonymize("Dr. Smith")
+    assert third.startswith("<ID:") and third not in (first, second)
+
+def test_mask_strategy(monkeypatch):
+    monkeypatch.setattr(settings, "anonymize_strategy", "mask")
+    monkeypatch.setattr(settings, "mask_char", "#")
+    out, _ = anonymize("email a@b.io")
+    assert out == "email ######"
@@ -0,0 +1,64 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from mediscan_iq import api
+from mediscan_iq.config import settings
+
+LONG = (
+    "FINDINGS: There is a large right pleural effusion with adjacent consolidation. "
+    "The cardiac silhouette is enlarged. No pneumothorax is seen. "
+    "IMPRESSION: Right pleural effusion and consolidation, concerning for pneumonia."
+)
+
+
+@pytest.fixture(scope="module")
+def client():
+    # Unloadable model paths: the analyzer runs on the extractive/heuristic fallbacks, offline.
+    mp = pytest.MonkeyPatch()
+    mp.setenv("HF_HUB_OFFLINE", "1")
+    for name in ("summarizer_model", "risk_nli_model", "risk_embed_model", "risk_clf_model"):
+        mp.setattr(settings, name, "/nonexistent/model")
+    mp.setattr(settings, "langid_model_path", "")
+    mp.setattr(api, "_analyzer", None)
+    yield TestClient(api.app)
+    mp.undo()
+
+
+def _item(text, report_type="radiology"):
+    return {"text": text, "report_type": report_type}
+
+
+def test_batch_results_follow_input_order(client):
+    texts = [LONG, "Normal study.", "IMPRESSION: Acute intracranial hemorrhage. " + LONG, "No acute findings."]
+    resp = client.post("/analyze_batch", json={"items": [_item(t) for t in texts]})
+    assert resp.status_code == 200
+    results = resp.json()["results"]
+    assert len(results) == len(texts)
+    for text, result in zip(texts, results):
+        single = client.post("/analyze", json=_item(text)).json()
+        assert result["anonymized"] == single["anonymized"]
+        assert result["summary"] == single["summary"]
+        assert result["risk_level"] == single["risk_level"]
+
+def test_batch_mixes_short_and_long_items(client):
+    resp = client.post("/analyze_batch", json={"items": [_item("Normal study."), _item(LONG, "pathology")]})
+    assert resp.status_code == 200
+    short, long_ = resp.json()["results"]
+    assert short["meta"]["summ_mode"] == "passthrough"
+    assert short["summary"] == "Normal study."
+    assert long_["meta"]["summ_mode"] in ("abstractive", "extractive")
+    assert long_["report_type"] == "pathology"
+    assert long_["summary"]
+
+@pytest.mark.parametrize("n, status", [(0, 422), (1, 200), (32, 200), (33, 422)])
+def test_batch_size_limits(client, n, status):
+    resp = client.post("/analyze_batch", json={"items": [_item("Normal study.")] * n})
+    assert resp.status_code == status
+
+def test_one_invalid_item_rejects_the_batch(client):
+    bad_type = client.post("/analyze_batch", json={"items": [_item(LONG), _item(LONG, "dermatology")]})
+    assert bad_type.status_code == 422
+
+    too_long = "x" * (settings.max_chars + 1)
+    oversized = client.post("/analyze_batch", json={"items": [_item(LONG), _item(too_long)]})
+    assert oversized.status_code == 413
@@ -0,0 +1,82 @@
+import pytest
+
+from mediscan_iq.config import settings
+from mediscan_iq.preprocess import langid
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(langid, "_cache", type(langid._cache)())
+    monkeypatch.setattr(langid, "_fasttext_disabled", False)
+    monkeypatch.setattr(settings, "langid_model_path", "")
+    load = langid._fasttext_model
+    load.cache_clear()
+    yield
+    load.cache_clear()
+
+
+class _Binding:
+    def __init__(self, result=None, error=None):
+        self.calls = []
+        self.result, self.error = result, error
+
+    def predict(self, text, k, threshold, on_unicode_error):
+        self.calls.append(text)
+        if self.error:
+            raise self.error
+        return self.result
+
+
+class _Model:
+    def __init__(self, binding):
+        self.f = binding
+
+
+def _count_detects(monkeypatch):
+    calls = []
+
+    def fake_detect(text):
+        calls.append(text)
+        return "en"
+
+    monkeypatch.setattr(langid, "_detect", fake_detect)
+    return calls
+
+
+def test_cache_hit_skips_detection(monkeypatch):
+    calls = _count_detects(monkeypatch)
+    assert langid.detect_language("The patient is stable.") == "en"
+    assert langid.detect_language("The patient is stable.") == "en"
+    assert len(calls) == 1
+    # keyed by digest: raw text never sits in the cache
+    assert all(isinstance(k, bytes) for k in langid._cache)
+
+def test_cache_evicts_oldest_at_capacity(monkeypatch):
+    calls = _count_detects(monkeypatch)
+    for i in range(langid._CACHE_SIZE + 1):
+        langid.detect_language(f"note {i}")
+    assert len(langid._cache) == langid._CACHE_SIZE
+    langid.detect_language(f"note {langid._CACHE_SIZE}")  # newest: still cached
+    assert len(calls) == langid._CACHE_SIZE + 1
+    langid.detect_language("note 0")  # oldest: evicted, detected again
+    assert len(calls) == langid._CACHE_SIZE + 2
+
+def test_empty_model_path_uses_langdetect():
+    assert langid._fasttext_model() is None
+    text = "The patient presents with chest pain and shortness of breath since yesterday."
+    assert langid.detect_language(text) == "en"
+
+def test_binding_gets_one_newline_terminated_line(monkeypatch):
+    binding = _Binding(result=[(0.98, "__label__de")])
+    monkeypatch.setattr(langid, "_fasttext_model", lambda: _Model(binding))
+    assert langid.detect_language("Befund:\nkein Nachweis\n") == "de"
+    assert binding.calls == ["Befund: kein Nachweis \n"]
+
+def test_predict_failure_disables_fasttext(monkeypatch):
+    binding = _Binding(error=ValueError("boom"))
+    monkeypatch.setattr(langid, "_fasttext_model", lambda: _Model(binding))
+    text = "The patient presents with chest pain and shortness of breath since yesterday."
+    assert langid.detect_language(text) == "en"  # langdetect answered
+    assert langid._fasttext_disabled is True
+    langid.detect_language("A different note, also written in English for the detector.")
+    assert len(binding.calls) == 1
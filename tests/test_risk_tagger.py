@@ -0,0 +1,117 @@
+import inspect
+import re
+from collections import OrderedDict
+
+import pytest
+import torch
+
+from mediscan_iq.nlp.risk_tagger import (
+    HEURISTIC_PATTERNS,
+    RiskConfig,
+    RiskTagger,
+    _heuristic_probs,
+    _hypothesis,
+    heuristic_spans,
+)
+
+
+def _cache_of(fn):
+    return next(c.cell_contents for c in fn.__closure__ if isinstance(c.cell_contents, OrderedDict))
+
+
+def test_heuristic_caches_keep_no_report_text():
+    text = "Pt John Doe: acute pulmonary embolism."
+    assert heuristic_spans(text) == heuristic_spans(text)
+    assert dict(_heuristic_probs(text))["high risk"] == 0.85
+    for fn in (_heuristic_probs, heuristic_spans):
+        cache = _cache_of(fn)
+        assert cache and all(isinstance(k, bytes) and len(k) == 16 for k in cache)
+        assert not any("John Doe" in repr(v) for v in cache.values())
+
+
+WORDS = "the clinical case is low moderate high risk . no acute findings mild effusion".split()
+
+
+@pytest.fixture
+def tiny_nli(tmp_path):
+    from transformers import BertConfig, BertForSequenceClassification, BertTokenizerFast
+
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + WORDS
+    path = tmp_path / "vocab.txt"
+    path.write_text("\n".join(vocab) + "\n", encoding="utf-8")
+    # transformers 5 takes the vocab path as `vocab` (and ignores `vocab_file`); 4.x as `vocab_file`
+    key = "vocab" if "vocab" in inspect.signature(BertTokenizerFast.__init__).parameters else "vocab_file"
+    tokenizer = BertTokenizerFast(**{key: str(path)}, model_max_length=24)
+    assert tokenizer.vocab_size == len(vocab)
+    torch.manual_seed(0)
+    model = BertForSequenceClassification(
+        BertConfig(
+            vocab_size=len(vocab), hidden_size=8, num_hidden_layers=1, num_attention_heads=2,
+            intermediate_size=16, max_position_embeddings=32, num_labels=3,
+        )
+    ).eval()
+
+    tagger = RiskTagger.__new__(RiskTagger)  # no hub loading: wire the tiny model in directly
+    tagger.cfg = RiskConfig(
+        model_name="tiny", labels=["low risk", "moderate risk", "high risk"], th_high=0.64,
+        th_mod=0.42, device=torch.device("cpu"), use_heuristics=False, backend="nli",
+    )
+    tagger.tokenizer, tagger.model = tokenizer, model
+    tagger._hyp_parts = tagger._pretokenize_hypotheses()
+    return tagger
+
+
+@pytest.mark.parametrize(
+    "premise",
+    [
+        "no acute findings",
+        "mild effusion . " * 20,  # longer than model_max_length: the premise is clipped
+    ],
+)
+def test_spliced_nli_pairs_match_paired_encoding(tiny_nli, premise):
+    seen = {}
+    tiny_nli.model.register_forward_pre_hook(lambda mod, args, kwargs: seen.update(kwargs), with_kwargs=True)
+    probs = tiny_nli._nli_probs(premise)
+    assert probs.shape == (3,) and torch.isclose(probs.sum(), torch.tensor(1.0))
+
+    for row, label in enumerate(tiny_nli.cfg.labels):
+        expected = tiny_nli.tokenizer(
+            premise, _hypothesis(label), truncation="only_first", max_length=tiny_nli.tokenizer.model_max_length
+        )
+        if len(premise.split()) > tiny_nli.tokenizer.model_max_length:
+            assert len(expected["input_ids"]) == tiny_nli.tokenizer.model_max_length
+        keep = seen["attention_mask"][row].bool()
+        assert seen["input_ids"][row][keep].tolist() == expected["input_ids"]
+        assert seen["token_type_ids"][row][keep].tolist() == expected["token_type_ids"]
+
+
+def _collect_matches(text):
+    # the Streamlit app's original highlighter: one finditer per pattern, then sort and prune
+    spans = []
+    for severity, patterns in HEURISTIC_PATTERNS.items():
+        for pat in patterns:
+            for m in re.finditer(pat, text, flags=re.I):
+                spans.append((m.start(), m.end(), severity))
+    spans.sort(key=lambda x: (x[0], -(x[1] - x[0])))
+    non_overlap, last_end = [], -1
+    for s, e, sev in spans:
+        if s >= last_end:
+            non_overlap.append((s, e, sev))
+            last_end = e
+    return non_overlap
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Acute PULMONARY EMBOLISM with small Effusion; NSTEMI ruled out.",
+        "Mild cardiomegaly. Ischemic changes. Malignant-appearing Mass with invasion of the wall.",
+        "Subarachnoid hemorrhage; old rib FRACTURE, basilar consolidation and pneumonia. Perforation.",
+        "Mass invasion noted; myocardial   infarction; malignancy; ischemia; effusions absent.",
+        "No acute cardiopulmonary abnormality.",
+    ],
+)
+def test_heuristic_spans_match_per_pattern_scan(text):
+    spans = list(heuristic_spans(text))
+    assert spans == _collect_matches(text)
+    assert all(e <= s2 for (_, e, _), (s2, _, _) in zip(spans, spans[1:]))
@@ -0,0 +1,146 @@
+import inspect
+import math
+import re
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+import torch
+
+from mediscan_iq.config import settings
+from mediscan_iq.nlp import summarizer as summ
+
+
+class _Seq2Seq(torch.nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.encoder = torch.nn.Linear(2, 2)
+
+    def get_encoder(self):
+        return self.encoder
+
+
+def test_warmup_failure_falls_back_to_eager(monkeypatch):
+    model = _Seq2Seq()
+    model.compile()
+    model.encoder.compile()
+    monkeypatch.setattr(summ, "load_seq2seq", lambda *a, **kw: (object(), model))
+    monkeypatch.setattr(settings, "use_jit", True)
+
+    def broken_warmup(self):
+        raise RuntimeError("no C++ compiler")
+
+    monkeypatch.setattr(summ.Summarizer, "_warmup", broken_warmup)
+    s = summ.Summarizer()
+    assert s.abstractive_ok
+    assert model._compiled_call_impl is None
+    assert model.encoder._compiled_call_impl is None
+
+
+def _reference_extractive(text, max_sents=3):
+    # the original scorer: substring keyword test on a lowered copy, full sort
+    sents = [s.strip() for s in re.split(r"(?<=[.!?])\s+", text) if len(s.strip()) > 3]
+    def score(idx, s):
+        boost = 1.0 + sum(wt for k, wt in summ.KEY_BOOSTS.items() if k in s.lower()) * 0.15
+        return math.log(len(s.split()) + 1) * (1.0 / (1.0 + idx * 0.15)) * boost
+    scored = sorted(((score(i, s), s) for i, s in enumerate(sents)), reverse=True)
+    return " ".join(s for _, s in scored[:max_sents])
+
+# Equal word counts, so keyword boosts and position decide; no two scores tie.
+NOTE = (
+    "Lungs are clear bilaterally today. "
+    "Small left PLEURAL EFFUSION noted. "
+    "Massive Pneumonia with consolidation seen. "
+    "Heart size is normal here. "
+    "Possible EMBOLISM and ischemia present."
+)
+
+def test_extractive_top_k_in_score_order():
+    assert summ.extractive_summary(NOTE, max_sents=3) == (
+        "Massive Pneumonia with consolidation seen. "
+        "Small left PLEURAL EFFUSION noted. "
+        "Lungs are clear bilaterally today."
+    )
+
+@pytest.mark.parametrize("max_sents", [1, 2, 3, 4, 5])
+def test_extractive_boosts_match_substring_check(max_sents):
+    # mixed case and keywords inside words ("Massive" -> mass) boost as `k in s.lower()` did
+    assert summ.extractive_summary(NOTE, max_sents) == _reference_extractive(NOTE, max_sents)
+
+def test_extractive_max_sents_bounds():
+    assert summ.extractive_summary(NOTE, max_sents=0) == ""
+    everything = summ.extractive_summary(NOTE, max_sents=10)
+    assert everything == _reference_extractive(NOTE, max_sents=5)
+    assert summ.extractive_summary(NOTE, max_sents=5) == everything
+
+
+@pytest.mark.parametrize(
+    "scores, k, expected",
+    [
+        ([1.0, 1.0, 1.0, 1.0], 2, [0, 1]),
+        ([1.0, 1.0, 1.0, 1.0], 4, [0, 1, 2, 3]),
+        ([0.5, 2.0, 1.0, 2.0, 1.0], 3, [1, 3, 2]),
+        ([0.5, 2.0, 1.0, 2.0, 1.0], 9, [1, 3, 2, 4, 0]),
+    ],
+)
+def test_top_k_ties_keep_earlier_index_first(scores, k, expected):
+    assert summ._top_k(np.array(scores), k).tolist() == expected
+
+
+@pytest.fixture
+def wordpiece_tokenizer(tmp_path):
+    from transformers import BertTokenizerFast
+
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + [f"w{i}" for i in range(100)]
+    path = tmp_path / "vocab.txt"
+    path.write_text("\n".join(vocab) + "\n", encoding="utf-8")
+    # transformers 5 takes the vocab path as `vocab` (and ignores `vocab_file`); 4.x as `vocab_file`
+    key = "vocab" if "vocab" in inspect.signature(BertTokenizerFast.__init__).parameters else "vocab_file"
+    tokenizer = BertTokenizerFast(**{key: str(path)}, model_max_length=512)
+    assert tokenizer.vocab_size == len(vocab)
+    return tokenizer
+
+
+def _truncator(tokenizer, max_input_tokens):
+    s = summ.Summarizer.__new__(summ.Summarizer)  # no model loading: only the tokenizer is used
+    s.tokenizer = tokenizer
+    s.cfg = SimpleNamespace(max_input_tokens=max_input_tokens)
+    return s
+
+
+def _words(ids, tokenizer):
+    return tokenizer.convert_ids_to_tokens(ids)
+
+
+def test_truncate_keeps_prompt_that_fits(wordpiece_tokenizer):
+    text = " ".join(f"w{i}" for i in range(10))
+    ids = _truncator(wordpiece_tokenizer, 20)._truncate_by_tokens(text)
+    assert ids == wordpiece_tokenizer(text)["input_ids"]
+
+@pytest.mark.parametrize(
+    "max_input_tokens, model_max_length, head, tail",
+    [
+        (20, 512, 10, 8),  # budget 18 body tokens: floor(0.6 * 18) head, rest tail
+        (512, 12, 6, 4),  # model_max_length is the tighter bound: budget 10
+    ],
+)
+def test_truncate_head_tail_split(wordpiece_tokenizer, max_input_tokens, model_max_length, head, tail):
+    wordpiece_tokenizer.model_max_length = model_max_length
+    text = " ".join(f"w{i}" for i in range(50))
+    ids = _truncator(wordpiece_tokenizer, max_input_tokens)._truncate_by_tokens(text)
+    assert len(ids) == min(max_input_tokens, model_max_length)
+    tokens = _words(ids, wordpiece_tokenizer)
+    assert tokens[0] == "[CLS]" and tokens[-1] == "[SEP]"
+    assert tokens[1:-1] == [f"w{i}" for i in range(head)] + [f"w{i}" for i in range(50 - tail, 50)]
+
+def test_truncate_counts_unknown_tokens_against_the_budget(wordpiece_tokenizer):
+    # out-of-vocab words become [UNK]; they are body text, not BOS/EOS, so they are cut too
+    truncator = _truncator(wordpiece_tokenizer, 20)
+    assert len(truncator._truncate_by_tokens("zz " * 50)) == 20
+
+    text = "zz zz " + " ".join(f"w{i}" for i in range(50)) + " zz"
+    tokens = _words(truncator._truncate_by_tokens(text), wordpiece_tokenizer)
+    assert tokens == (
+        ["[CLS]", "[UNK]", "[UNK]"] + [f"w{i}" for i in range(8)]
+        + [f"w{i}" for i in range(43, 50)] + ["[UNK]", "[SEP]"]
+    )